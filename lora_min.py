@@ -6,6 +6,11 @@ from machine import Pin, SPI
 import time
 import struct
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    asyncio = None  # recv_async unavailable; blocking API unaffected
+
 class SX1276:
     # Registers (subset)
     REG_FIFO                = 0x00
@@ -50,11 +55,45 @@ class SX1276:
     FXOSC = 32000000
     FSTEP = FXOSC / (1 << 19)
 
-    def __init__(self, spi_id=1, sck=18, mosi=23, miso=19, cs=5, rst=17, baudrate=5_000_000):
+    def __init__(self, spi_id=1, sck=18, mosi=23, miso=19, cs=5, rst=17, dio0=None,
+                 baudrate=10_000_000):
         self.cs = Pin(cs, Pin.OUT, value=1)
         self.rst = Pin(rst, Pin.OUT, value=1)
-        self.spi = SPI(spi_id, baudrate=baudrate, polarity=0, phase=0,
-                       sck=Pin(sck), mosi=Pin(mosi), miso=Pin(miso))
+        # SX1276 SPI is rated to 10 MHz; that halves FIFO transfer time
+        # vs the old 5 MHz default. Keep wiring short at this rate. Fall
+        # back if the port can't clock the requested rate.
+        try:
+            self.spi = SPI(spi_id, baudrate=baudrate, polarity=0, phase=0,
+                           sck=Pin(sck), mosi=Pin(mosi), miso=Pin(miso))
+        except (ValueError, OSError):
+            self.spi = SPI(spi_id, baudrate=5_000_000, polarity=0, phase=0,
+                           sck=Pin(sck), mosi=Pin(mosi), miso=Pin(miso))
+        # Reusable scratch for the SPI write path: header byte and
+        # single-register value. Writing through these avoids a bytearray
+        # allocation + concat on every register access (GC churn).
+        self._hdr1 = bytearray(1)
+        self._reg1 = bytearray(1)
+        # Full-duplex read scratch: address byte + up to 256 payload
+        # bytes. TX dummy bytes stay zero after init.
+        self._rd_tx = bytearray(257)
+        self._rd_rx = bytearray(257)
+        # TX FIFO scratch: burst-write header byte + payload, so send()
+        # loads the FIFO with one allocation-free SPI write. The header
+        # never changes, write it once.
+        self._tx_scratch = bytearray(258)
+        self._tx_scratch[0] = 0x80 | self.REG_FIFO
+        # Optional DIO0 wiring: when given, TxDone/RxDone wake us via a
+        # pin interrupt and the wait loops stop hammering IRQ_FLAGS over
+        # SPI. Without it the driver polls exactly as before.
+        self._dio0_evt = 0
+        self._rx_tsf = None
+        if dio0 is not None:
+            if asyncio is not None:
+                self._rx_tsf = asyncio.ThreadSafeFlag()
+            self._dio0 = Pin(dio0, Pin.IN)
+            self._dio0.irq(trigger=Pin.IRQ_RISING, handler=self._dio0_isr)
+        else:
+            self._dio0 = None
         self._reset()
         # Enter LoRa + sleep, then standby
         self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_SLEEP)
@@ -66,61 +105,85 @@ class SX1276:
         if ver != 0x12:  # Some clones report different, but 0x12 is standard
             raise AssertionError("LoRa chip not found (VERSION=0x%02X)" % ver)
 
-        # Basic radio defaults (BW125, CR4/5, Explicit header, CRC on, SF7)
-        # ModemConfig1: [BW|CR|ImplicitHeader]
-        #   BW=125kHz -> 0x70, CR=4/5 -> 0x02, Explicit(0)
-        self._write_reg(self.REG_MODEM_CONFIG1, 0x72)  # 0b0111_0010
-        # ModemConfig2: [SF|TxCont|RxPayloadCrcOn|SymbTimeoutHi]
-        #   SF7 -> 0x70, CRC on -> 0x04
-        self._write_reg(self.REG_MODEM_CONFIG2, 0x74)  # 0b0111_0100
+        # Basic radio defaults (BW125, CR4/5, Explicit header, CRC on, SF7).
+        # Consecutive registers are written as auto-increment bursts: one
+        # CS-framed transaction per group instead of one per register.
+        # ModemConfig1: BW=125kHz -> 0x70, CR=4/5 -> 0x02, Explicit(0)
+        # ModemConfig2: SF7 -> 0x70, CRC on -> 0x04
+        self._write_buf(self.REG_MODEM_CONFIG1, b"\x72\x74")  # 0x1D,0x1E
+        # ModemConfig3 (0x26) is not adjacent, and 0x1F is SymbTimeout
+        # (reset 0x64) which a gap-filling burst would clobber.
         # ModemConfig3: LowDataRateOptimize(0), AgcAutoOn(1)
         self._write_reg(self.REG_MODEM_CONFIG3, 0x04)
+        # Software shadows of the ModemConfig registers: this driver is
+        # the only writer, so the set_* helpers modify these instead of
+        # doing an SPI read-modify-write per call.
+        self._mc1 = 0x72
+        self._mc2 = 0x74
+        self._mc3 = 0x04
 
-        # Preamble 8 symbols
-        self._write_reg(self.REG_PREAMBLE_MSB, 0x00)
-        self._write_reg(self.REG_PREAMBLE_LSB, 0x08)
+        # Preamble 8 symbols (0x20,0x21)
+        self._write_buf(self.REG_PREAMBLE_MSB, b"\x00\x08")
 
-        # FIFO base addresses
-        self._write_reg(self.REG_FIFO_TX_BASE_ADDR, 0x00)
-        self._write_reg(self.REG_FIFO_RX_BASE_ADDR, 0x00)
+        # FIFO base addresses (0x0E,0x0F)
+        self._write_buf(self.REG_FIFO_TX_BASE_ADDR, b"\x00\x00")
 
         # PA config: PA_BOOST on, power will be set via set_tx_power()
         self._write_reg(self.REG_PA_CONFIG, 0x8F)  # placeholder
-        self._write_reg(self.REG_OCP, 0x20 | 0x13)  # OCP on, 100mA
-        self._write_reg(self.REG_LNA, 0x23)  # LNA boost
+        # OCP on/100mA + LNA boost (0x0B,0x0C)
+        self._write_buf(self.REG_OCP, b"\x33\x23")
 
         # Clear IRQs
         self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
 
+        self._pa_dac = None  # shadow of REG_PA_DAC, see set_tx_power
+
     # --- Low-level SPI ---
+    def _dio0_isr(self, pin):
+        # ISR context: set flags and get out, no allocation allowed here.
+        self._dio0_evt = 1
+        if self._rx_tsf is not None:
+            self._rx_tsf.set()
+
     def _reset(self):
         self.rst.value(0); time.sleep_ms(10)
         self.rst.value(1); time.sleep_ms(10)
 
     def _write_buf(self, addr, buf):
+        self._hdr1[0] = addr | 0x80
         self.cs.value(0)
-        self.spi.write(bytearray([addr | 0x80]) + buf)
+        self.spi.write(self._hdr1)
+        self.spi.write(buf)
         self.cs.value(1)
 
     def _read_buf(self, addr, length):
+        # One full-duplex transaction: the address byte plus dummy clocks
+        # go out while the reply shifts in, instead of a write() call
+        # followed by a separate read() with a bus turnaround between.
+        self._rd_tx[0] = addr & 0x7F
+        mv_tx = memoryview(self._rd_tx)[:length + 1]
+        mv_rx = memoryview(self._rd_rx)[:length + 1]
         self.cs.value(0)
-        self.spi.write(bytearray([addr & 0x7F]))
-        data = self.spi.read(length)
+        self.spi.write_readinto(mv_tx, mv_rx)
         self.cs.value(1)
-        return data
+        return bytes(mv_rx[1:])
 
     def _write_reg(self, addr, val):
-        self._write_buf(addr, bytearray([val & 0xFF]))
+        self._reg1[0] = val & 0xFF
+        self._write_buf(addr, self._reg1)
 
     def _read_reg(self, addr):
         return self._read_buf(addr, 1)[0]
 
     # --- Radio helpers ---
     def set_frequency(self, freq_hz):
-        frf = int(freq_hz / self.FSTEP)
-        self._write_reg(self.REG_FRF_MSB, (frf >> 16) & 0xFF)
-        self._write_reg(self.REG_FRF_MID, (frf >> 8) & 0xFF)
-        self._write_reg(self.REG_FRF_LSB, frf & 0xFF)
+        # Integer math: frf = freq_hz * 2^19 / FXOSC. Same register
+        # value as int(freq_hz / FSTEP) for integer Hz input, without
+        # the software float divide. FRF_MSB/MID/LSB are consecutive,
+        # so program all three in one burst.
+        frf = (int(freq_hz) << 19) // self.FXOSC
+        self._write_buf(self.REG_FRF_MSB,
+                        bytes([(frf >> 16) & 0xFF, (frf >> 8) & 0xFF, frf & 0xFF]))
 
     def set_tx_power(self, level_dbm=14):
         # Use PA_BOOST path (typical on SX1276 modules)
@@ -128,22 +191,28 @@ class SX1276:
         level = max(2, min(17, level_dbm))
         self._write_reg(self.REG_PA_CONFIG, 0x80 | (level - 2))  # PA_BOOST + power
         # Ensure PA_DAC normal (0x84). If you need 20 dBm, set to 0x87 and raise level.
-        self._write_reg(self.REG_PA_DAC, 0x84)
+        # PA_DAC (0x4D) is nowhere near PA_CONFIG (0x09), so it can't join a
+        # burst; shadow it instead and skip the SPI write when unchanged.
+        if self._pa_dac != 0x84:
+            self._write_reg(self.REG_PA_DAC, 0x84)
+            self._pa_dac = 0x84
 
     def set_spreading_factor(self, sf=7):
         sf = max(6, min(12, sf))
-        mc2 = self._read_reg(self.REG_MODEM_CONFIG2)
-        mc2 = (mc2 & 0x0F) | ((sf << 4) & 0xF0)
+        mc2 = (self._mc2 & 0x0F) | ((sf << 4) & 0xF0)
         # CRC on (bit2=1), explicit header
         mc2 = (mc2 | 0x04)
+        self._mc2 = mc2
         self._write_reg(self.REG_MODEM_CONFIG2, mc2)
         # LowDataRateOptimize recommended if SF11/12 with BW125
-        mc3 = self._read_reg(self.REG_MODEM_CONFIG3)
+        mc3 = self._mc3
         if sf >= 11:
             mc3 |= 0x08
         else:
             mc3 &= ~0x08
-        self._write_reg(self.REG_MODEM_CONFIG3, mc3)
+        if mc3 != self._mc3:
+            self._mc3 = mc3
+            self._write_reg(self.REG_MODEM_CONFIG3, mc3)
 
     def standby(self):
         self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_STDBY)
@@ -160,15 +229,29 @@ class SX1276:
         # Set FIFO ptr
         tx_base = self._read_reg(self.REG_FIFO_TX_BASE_ADDR)
         self._write_reg(self.REG_FIFO_ADDR_PTR, tx_base)
-        # Load FIFO
-        self._write_buf(self.REG_FIFO, data)
+        # Load FIFO: copy into the TX scratch and push header+payload
+        # as a single SPI write
+        n = len(data)
+        self._tx_scratch[1:1 + n] = data
+        self.cs.value(0)
+        self.spi.write(memoryview(self._tx_scratch)[:1 + n])
+        self.cs.value(1)
         # Payload length (explicit header will include it, but safe to set)
         self._write_reg(self.REG_PAYLOAD_LENGTH, len(data))
+        if self._dio0 is not None:
+            self._write_reg(self.REG_DIO_MAPPING1, 0x40)  # DIO0 = TxDone
+            self._dio0_evt = 0
         # Go TX
         self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_TX)
 
         t0 = time.ticks_ms()
         while True:
+            if self._dio0 is not None and not self._dio0_evt:
+                if time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
+                    self.standby()
+                    return False
+                time.sleep_ms(1)
+                continue
             irq = self._read_reg(self.REG_IRQ_FLAGS)
             if irq & self.IRQ_TX_DONE_MASK:
                 self._write_reg(self.REG_IRQ_FLAGS, self.IRQ_TX_DONE_MASK)  # clear
@@ -177,6 +260,9 @@ class SX1276:
             if time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
                 self.standby()
                 return False
+            # TX at SF7 lasts tens of ms; a 500us pause between polls
+            # cuts the SPI traffic ~100x without adding visible latency.
+            time.sleep_us(500)
 
     def rx_continuous(self):
         """Enter RX_CONTINUOUS and keep it there (for fast polling reads)."""
@@ -185,6 +271,9 @@ class SX1276:
         # Set RX base and ptr
         rx_base = self._read_reg(self.REG_FIFO_RX_BASE_ADDR)
         self._write_reg(self.REG_FIFO_ADDR_PTR, rx_base)
+        if self._dio0 is not None:
+            self._write_reg(self.REG_DIO_MAPPING1, 0x00)  # DIO0 = RxDone
+            self._dio0_evt = 0
         # Continuous RX
         self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_RX_CONTINUOUS)
 
@@ -195,26 +284,33 @@ class SX1276:
         """
         t0 = time.ticks_ms()
         while True:
+            if self._dio0 is not None and not self._dio0_evt:
+                if timeout_ms and time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
+                    return (None, None, None)
+                time.sleep_ms(1)
+                continue
             irq = self._read_reg(self.REG_IRQ_FLAGS)
 
             if irq & self.IRQ_RX_DONE_MASK:
+                self._dio0_evt = 0
                 # CRC error
                 if irq & self.IRQ_PAYLOAD_CRC_ERROR:
                     self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
                     return (None, None, None)
 
-                fifo_addr = self._read_reg(self.REG_FIFO_RX_CURRENT_ADDR)
-                self._write_reg(self.REG_FIFO_ADDR_PTR, fifo_addr)
-                nbytes = self._read_reg(self.REG_RX_NB_BYTES)
-                payload = self._read_buf(self.REG_FIFO, nbytes)
+                # Burst 0x10..0x13 in one transaction: current addr,
+                # irq mask, irq flags, byte count auto-increment out.
+                hdr = self._read_buf(self.REG_FIFO_RX_CURRENT_ADDR, 4)
+                self._write_reg(self.REG_FIFO_ADDR_PTR, hdr[0])
+                payload = self._read_buf(self.REG_FIFO, hdr[3])
 
-                pkt_snr = self._read_reg(self.REG_PKT_SNR_VALUE)
+                # SNR (0x19) and RSSI (0x1A) are adjacent: one more burst
+                stats = self._read_buf(self.REG_PKT_SNR_VALUE, 2)
+                pkt_snr = stats[0]
                 if pkt_snr > 127:
                     pkt_snr -= 256
                 snr_db = pkt_snr / 4.0
-
-                pkt_rssi = self._read_reg(self.REG_PKT_RSSI_VALUE)
-                rssi_dbm = -157 + pkt_rssi
+                rssi_dbm = -157 + stats[1]
 
                 # Clear IRQs, BUT stay in RX_CONTINUOUS
                 self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
@@ -222,6 +318,9 @@ class SX1276:
 
             if timeout_ms and time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
                 return (None, None, None)
+            # Packet airtime >= ~10ms at SF7/BW125; 500us between polls
+            # is invisible to latency but stops hammering the bus.
+            time.sleep_us(500)
 
 
     def recv(self, timeout_ms=0):
@@ -232,13 +331,23 @@ class SX1276:
         # Set RX base and ptr
         rx_base = self._read_reg(self.REG_FIFO_RX_BASE_ADDR)
         self._write_reg(self.REG_FIFO_ADDR_PTR, rx_base)
+        if self._dio0 is not None:
+            self._write_reg(self.REG_DIO_MAPPING1, 0x00)  # DIO0 = RxDone
+            self._dio0_evt = 0
         # Continuous RX
         self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_RX_CONTINUOUS)
 
         t0 = time.ticks_ms()
         while True:
+            if self._dio0 is not None and not self._dio0_evt:
+                if timeout_ms and time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
+                    self.standby()
+                    return (None, None, None)
+                time.sleep_ms(1)
+                continue
             irq = self._read_reg(self.REG_IRQ_FLAGS)
             if irq & self.IRQ_RX_DONE_MASK:
+                self._dio0_evt = 0
                 # Check CRC
                 if irq & self.IRQ_PAYLOAD_CRC_ERROR:
                     self._write_reg(self.REG_IRQ_FLAGS, 0xFF)  # clear all and continue
@@ -246,22 +355,22 @@ class SX1276:
                     self.standby()
                     return (None, None, None)
 
-                # Where is the packet?
-                fifo_addr = self._read_reg(self.REG_FIFO_RX_CURRENT_ADDR)
-                self._write_reg(self.REG_FIFO_ADDR_PTR, fifo_addr)
-                nbytes = self._read_reg(self.REG_RX_NB_BYTES)
-                payload = self._read_buf(self.REG_FIFO, nbytes)
-
-                # RSSI / SNR
-                pkt_snr = self._read_reg(self.REG_PKT_SNR_VALUE)
-                # signed value: two's complement, /4 dB
+                # Where is the packet? Burst 0x10..0x13 in one
+                # transaction: current addr, irq mask, irq flags, byte
+                # count come back together.
+                hdr = self._read_buf(self.REG_FIFO_RX_CURRENT_ADDR, 4)
+                self._write_reg(self.REG_FIFO_ADDR_PTR, hdr[0])
+                payload = self._read_buf(self.REG_FIFO, hdr[3])
+
+                # RSSI / SNR: adjacent registers (0x19,0x1A), one burst
+                stats = self._read_buf(self.REG_PKT_SNR_VALUE, 2)
+                # SNR is signed two's complement, /4 dB
+                pkt_snr = stats[0]
                 if pkt_snr > 127:
                     pkt_snr -= 256
                 snr_db = pkt_snr / 4.0
-
-                pkt_rssi = self._read_reg(self.REG_PKT_RSSI_VALUE)
                 # RSSI in dBm depends on freq band; for HF (>= 779 MHz), formula ~ -157 + pkt_rssi
-                rssi_dbm = -157 + pkt_rssi
+                rssi_dbm = -157 + stats[1]
                 # Clear IRQs & go standby so next call is clean
                 self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
                 self.standby()
@@ -270,7 +379,55 @@ class SX1276:
             if timeout_ms and time.ticks_diff(time.ticks_ms(), t0) > timeout_ms:
                 self.standby()
                 return (None, None, None)
-    
+            time.sleep_us(500)
+
+    async def recv_async(self, timeout_ms=0):
+        """Coroutine receive: awaits the DIO0 RxDone interrupt instead of
+        blocking the interpreter, so other uasyncio tasks keep running.
+        Needs uasyncio and a dio0 pin. Same return tuple as recv()."""
+        if asyncio is None or self._rx_tsf is None:
+            raise RuntimeError("recv_async needs uasyncio and a dio0 pin")
+        # Same RX entry as recv()
+        self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
+        rx_base = self._read_reg(self.REG_FIFO_RX_BASE_ADDR)
+        self._write_reg(self.REG_FIFO_ADDR_PTR, rx_base)
+        self._write_reg(self.REG_DIO_MAPPING1, 0x00)  # DIO0 = RxDone
+        self._dio0_evt = 0
+        self._write_reg(self.REG_OP_MODE, self.MODE_LONG_RANGE_MODE | self.MODE_RX_CONTINUOUS)
+
+        while True:
+            try:
+                if timeout_ms:
+                    await asyncio.wait_for_ms(self._rx_tsf.wait(), timeout_ms)
+                else:
+                    await self._rx_tsf.wait()
+            except asyncio.TimeoutError:
+                self.standby()
+                return (None, None, None)
+
+            irq = self._read_reg(self.REG_IRQ_FLAGS)
+            if not (irq & self.IRQ_RX_DONE_MASK):
+                continue  # spurious wake; back to waiting
+            if irq & self.IRQ_PAYLOAD_CRC_ERROR:
+                self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
+                self.standby()
+                return (None, None, None)
+
+            hdr = self._read_buf(self.REG_FIFO_RX_CURRENT_ADDR, 4)
+            self._write_reg(self.REG_FIFO_ADDR_PTR, hdr[0])
+            payload = self._read_buf(self.REG_FIFO, hdr[3])
+
+            stats = self._read_buf(self.REG_PKT_SNR_VALUE, 2)
+            pkt_snr = stats[0]
+            if pkt_snr > 127:
+                pkt_snr -= 256
+            snr_db = pkt_snr / 4.0
+            rssi_dbm = -157 + stats[1]
+
+            self._write_reg(self.REG_IRQ_FLAGS, 0xFF)
+            self.standby()
+            return (payload, rssi_dbm, snr_db)
+
     # BW/CR/CRC helpers for CSS
 
     def set_bandwidth(self, bw_hz=125000):
@@ -284,8 +441,8 @@ class SX1276:
         if bw_hz not in bw_map:
             raise ValueError("Unsupported BW: %s (use 125000/250000/500000)" % bw_hz)
 
-        mc1 = self._read_reg(self.REG_MODEM_CONFIG1)
-        mc1 = (mc1 & 0x0F) | bw_map[bw_hz]   # keep low nibble, set BW
+        mc1 = (self._mc1 & 0x0F) | bw_map[bw_hz]   # keep low nibble, set BW
+        self._mc1 = mc1
         self._write_reg(self.REG_MODEM_CONFIG1, mc1)
 
         # Update LowDataRateOptimize based on Tsym > 16ms rule-of-thumb
@@ -298,29 +455,28 @@ class SX1276:
         if cr not in cr_map:
             raise ValueError("Unsupported CR: %s (use 5..8 meaning 4/5..4/8)" % cr)
 
-        mc1 = self._read_reg(self.REG_MODEM_CONFIG1)
-        mc1 = (mc1 & 0xF1) | cr_map[cr]      # keep BW + header bit, set CR bits
+        mc1 = (self._mc1 & 0xF1) | cr_map[cr]      # keep BW + header bit, set CR bits
+        self._mc1 = mc1
         self._write_reg(self.REG_MODEM_CONFIG1, mc1)
 
     def set_crc(self, enable=True):
-        mc2 = self._read_reg(self.REG_MODEM_CONFIG2)
+        mc2 = self._mc2
         if enable:
             mc2 |= 0x04  # RxPayloadCrcOn
         else:
             mc2 &= ~0x04
+        self._mc2 = mc2
         self._write_reg(self.REG_MODEM_CONFIG2, mc2)
 
     def _get_bw_hz(self):
-        mc1 = self._read_reg(self.REG_MODEM_CONFIG1)
-        bw_nibble = mc1 & 0xF0
+        bw_nibble = self._mc1 & 0xF0
         if bw_nibble == 0x70: return 125000
         if bw_nibble == 0x80: return 250000
         if bw_nibble == 0x90: return 500000
         return 125000  # fallback
 
     def _get_sf(self):
-        mc2 = self._read_reg(self.REG_MODEM_CONFIG2)
-        return (mc2 >> 4) & 0x0F
+        return (self._mc2 >> 4) & 0x0F
 
     def _update_ldro(self):
         # Enable LowDataRateOptimize if Tsym > ~16ms
@@ -328,9 +484,11 @@ class SX1276:
         sf = self._get_sf()
         tsym_ms = ( (1 << sf) * 1000 ) / bw
 
-        mc3 = self._read_reg(self.REG_MODEM_CONFIG3)
+        mc3 = self._mc3
         if tsym_ms > 16:
             mc3 |= 0x08
         else:
             mc3 &= ~0x08
-        self._write_reg(self.REG_MODEM_CONFIG3, mc3)
+        if mc3 != self._mc3:
+            self._mc3 = mc3
+            self._write_reg(self.REG_MODEM_CONFIG3, mc3)
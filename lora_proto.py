@@ -0,0 +1,396 @@
+# lora_proto.py — shared protocol helpers for the RSSI-handshake + FHSS demo (MicroPython)
+# One copy of the hop schedule, KDFs, AES/padding helpers and frame parsing,
+# imported by lora_sender.py and lora_receiver.py so both boards run (and
+# freeze) identical protocol code.
+import time, micropython, ucryptolib, ubinascii, uhashlib, struct
+from micropython import const
+
+# --- secure random bytes for nonces/IVs/session keys ---
+try:
+    from os import urandom
+except ImportError:
+    try:
+        from uos import urandom
+    except ImportError:
+        import machine
+        def urandom(n): return bytes(machine.rng() & 0xFF for _ in range(n))
+
+# Prefer the C builtins bytes.fromhex / bytes.hex where the port has
+# them; fall back to ubinascii so older firmware keeps working.
+try:
+    fromhex = bytes.fromhex
+except AttributeError:
+    fromhex = ubinascii.unhexlify
+
+# For parsers that stay in bytes: unhexlify takes bytes as well as str,
+# where bytes.fromhex wants a str.
+unhex = ubinascii.unhexlify
+
+try:
+    bytes.hex
+    def tohex(b): return b.hex()
+except AttributeError:
+    def tohex(b): return ubinascii.hexlify(b).decode()
+
+class Hex:
+    # Lazy hex for print(): conversion runs only if the stream actually
+    # formats the object, so prints that go nowhere (no serial attached)
+    # don't pay for the hexlify.
+    __slots__ = ("b",)
+    def __init__(self, b):
+        self.b = b
+    def __str__(self):
+        return tohex(self.b)
+
+# === FHSS CONFIG (shared by both ends by construction) ===
+FREQ_TABLE_MHZ = (920.6, 920.8, 921.0, 921.2, 921.4, 921.6, 923.2, 923.4)
+# Integer-Hz table built once at import so the hop path never does the
+# float multiply / int() cast (float emulation is slow on the MCU).
+FREQ_TABLE_HZ  = tuple(int(round(f * 1_000_000)) for f in FREQ_TABLE_MHZ)
+# Table length is a power of two, so the hop index is a mask, not a
+# divide. const() so the compiler inlines the mask as an immediate.
+_NFREQ = const(8)
+FREQ_TABLE_MASK = const(_NFREQ - 1)
+assert len(FREQ_TABLE_MHZ) == _NFREQ, "freq table must have _NFREQ entries"
+# Power of two so slot math is shift/mask - Xtensa has no hardware
+# divide, and these run at the top of every loop iteration. ~8.2 s
+# per hop instead of the old 10 s; both sides share this const.
+HOP_INTERVAL_MS = const(8192)
+_HOP_SHIFT      = const(13)
+_HOP_MASK       = const(8191)
+assert 1 << _HOP_SHIFT == HOP_INTERVAL_MS
+SECRET_SEED     = const(0x1234ABCD)
+
+# Guard so we don't miss frames around slot edges
+HOP_GUARD_MS = const(250)        # tune 100–500ms depending on your timing
+
+TAG_BLOCK = b"HSK-OK-ICEWIN!!#"  # handshake marker block (16 bytes)
+
+_U64 = 0xFFFFFFFFFFFFFFFF
+
+@micropython.native
+def _prn_from_slot(slot):
+    # SplitMix64: one add, two multiply-xorshift rounds. The old 31-bit
+    # LCG had poor low-bit diversity, and the hop index is exactly the
+    # low bits; SplitMix64's output is uniform down to bit 0. native,
+    # not viper: the intermediates need 64 bits and viper words are 32.
+    # Runs once per slot change, so bigint arithmetic is irrelevant.
+    x = (SECRET_SEED ^ slot) & _U64
+    x = (x + 0x9E3779B97F4A7C15) & _U64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _U64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _U64
+    return x ^ (x >> 31)
+
+@micropython.native
+def hop_idx_for_slot(slot):
+    return _prn_from_slot(slot) & FREQ_TABLE_MASK
+
+def hop_freq_for_slot(slot):
+    return FREQ_TABLE_MHZ[hop_idx_for_slot(slot)]
+
+@micropython.native
+def current_slot():
+    return time.ticks_ms() >> _HOP_SHIFT
+
+# Only touch the radio when the slot actually changes: reprogramming the
+# PLL is an SPI round-trip plus lock time, and the mains call this every
+# loop iteration while a slot lasts HOP_INTERVAL_MS.
+_last_slot = -1
+_last_freq_mhz = 0.0
+
+def set_freq_for_slot(lora, slot):
+    global _last_slot, _last_freq_mhz
+    if slot == _last_slot:
+        return _last_freq_mhz
+    idx = hop_idx_for_slot(slot)
+    lora.set_frequency(FREQ_TABLE_HZ[idx])
+    _last_slot = slot
+    _last_freq_mhz = FREQ_TABLE_MHZ[idx]
+    return _last_freq_mhz
+
+@micropython.native
+def time_left_in_slot_ms():
+    return HOP_INTERVAL_MS - (time.ticks_ms() & _HOP_MASK)
+
+@micropython.native
+def slot_and_left_ms():
+    # Slot and time-left from one ticks_ms() read. The mains need both
+    # at the top of every loop iteration; calling current_slot() and
+    # time_left_in_slot_ms() separately costs two C-binding round trips
+    # and can straddle a slot edge between the reads.
+    now = time.ticks_ms()
+    return now >> _HOP_SHIFT, HOP_INTERVAL_MS - (now & _HOP_MASK)
+
+# ---------- RSSI quantization + KDFs ----------
+@micropython.native
+def q_rssi(rssi_dbm, step=1):
+    # native, not viper: step=1 callers pass ints but the rounding is
+    # float math, which viper's typed locals would reject.
+    return int(round(rssi_dbm / step) * step)
+
+# v2: q is hashed as 2-byte big-endian signed instead of decimal ASCII.
+# Fixed width means no int->str allocation and a canonical encoding
+# (str(q) would make "-80" and "-080" distinct inputs). Wire change:
+# both sides derive from this module, so they move together.
+_KDF_PREFIX = b"RSSI-KDFv2|"
+
+# Scratch for the packed q; pack_into reuses it instead of allocating
+# a 2-byte object per KDF call in the brute loop.
+_Q_BUF = bytearray(2)
+
+def kdf_from_rssi_and_nonce(q, nonce_bytes):
+    # Feed the parts separately: same bytes hashed, but no b"..."+...+nonce
+    # concatenation temporaries (3 allocations per call in the brute loop).
+    struct.pack_into(">h", _Q_BUF, 0, q)
+    h = uhashlib.sha256(_KDF_PREFIX)
+    h.update(_Q_BUF)
+    h.update(b"|")
+    h.update(nonce_bytes)
+    return h.digest()[:16]
+
+# ---------- AES + padding ----------
+# ucryptolib re-runs the key schedule on every aes() construction, and
+# an ECB object locks to one direction after its first use, so cache
+# encryptors and decryptors separately, keyed by the key bytes. A few
+# entries cover a session (wrap key + current msg keys); oldest-first
+# eviction keeps RAM bounded. The brute-force scan builds its own
+# throwaway contexts and deliberately bypasses this.
+_ECB_CACHE_MAX = const(4)
+_ecb_enc_cache = {}
+_ecb_enc_order = []
+_ecb_dec_cache = {}
+_ecb_dec_order = []
+
+def _ecb_cipher(cache, order, key16):
+    c = cache.get(key16)
+    if c is None:
+        c = ucryptolib.aes(key16, 1)  # ECB
+        if len(order) >= _ECB_CACHE_MAX:
+            del cache[order.pop(0)]
+        cache[key16] = c
+        order.append(key16)
+    return c
+
+def aes_ecb_encrypt(key16, block16_mul):
+    return _ecb_cipher(_ecb_enc_cache, _ecb_enc_order, key16).encrypt(block16_mul)
+
+def aes_ecb_decrypt(key16, ct):
+    return _ecb_cipher(_ecb_dec_cache, _ecb_dec_order, key16).decrypt(ct)
+
+# ---------- AES-CTR for data frames ----------
+# Data frames are CTR, not CBC: ciphertext length equals message
+# length, so neither a 16-byte IV nor PKCS#7 padding rides on the air
+# (17-32 bytes per frame at LoRa rates). The keystream counter block
+# is deterministic - E_K(counter64 || block64) - which is safe here
+# because every message gets its own key; the frame counter goes into
+# the block anyway for hygiene, and it's already on the wire so the
+# receiver rebuilds the identical keystream for free.
+_CTR_BLK = bytearray(16)
+# Keystream scratch sized for the largest payload a frame can carry.
+_CTR_KS = bytearray(256)
+
+# Ports built with MICROPY_PY_UCRYPTOLIB_CTR expose CTR as mode 6: the
+# whole keystream+XOR then runs in C (hardware-backed where mbedtls
+# is). Probe once at import; others keep the ECB+viper-XOR fallback.
+# Both produce identical ciphertext: mode 6 increments the 16-byte
+# counter block big-endian, which is exactly the ">QQ" layout below.
+try:
+    ucryptolib.aes(b"\x00" * 16, 6, b"\x00" * 16)
+    _HAS_CTR = True
+except ValueError:
+    _HAS_CTR = False
+
+@micropython.viper
+def _xor_into(dst: ptr8, src: ptr8, ks: ptr8, n: int):
+    for i in range(n):
+        dst[i] = src[i] ^ ks[i]
+
+def ctr_crypt(key16, counter, data):
+    # Encrypt and decrypt are the same operation. data: bytes or
+    # memoryview; returns bytes of the same length.
+    blk = _CTR_BLK
+    if _HAS_CTR:
+        struct.pack_into(">QQ", blk, 0, counter & 0xFFFF, 0)
+        return ucryptolib.aes(key16, 6, blk).encrypt(data)
+    n = len(data)
+    ks = _CTR_KS
+    c = ucryptolib.aes(key16, 1)
+    mv = memoryview(ks)
+    for i in range((n + 15) >> 4):
+        struct.pack_into(">QQ", blk, 0, counter & 0xFFFF, i)
+        c.encrypt(blk, mv[i << 4:(i + 1) << 4])
+    out = bytearray(n)
+    _xor_into(out, data, ks, n)
+    return bytes(out)
+
+# ---------- Binary data framing ----------
+# Data frames are binary: |type:1|counter:2|t:4|ct_len:1|ct:N| - 8
+# bytes of header, and with CTR the ciphertext is exactly the message
+# length. On LoRa the airtime saved dwarfs any CPU concern, and
+# parsing collapses to one struct.unpack_from. Handshake frames are
+# rare and stay textual; "h" (0x68) and "e" (0x65) can't collide with
+# TYPE_DATA.
+TYPE_DATA = const(0x01)
+_DATA_HDR = const(8)
+
+# Frame assembly scratch: header + max 255-byte ciphertext. The driver
+# copies the payload into its own TX scratch before returning, so
+# handing out a memoryview of this buffer is safe.
+_TX_FRAME = bytearray(_DATA_HDR + 255)
+
+def pack_data_frame(counter, t_ms, ct):
+    n = len(ct)
+    struct.pack_into(">BHIB", _TX_FRAME, 0, TYPE_DATA, counter & 0xFFFF,
+                     t_ms & 0xFFFFFFFF, n)
+    _TX_FRAME[_DATA_HDR:_DATA_HDR + n] = ct
+    return memoryview(_TX_FRAME)[:_DATA_HDR + n]
+
+def unpack_data_frame(payload):
+    # (counter, t_ms, ct), or None if not a well-formed data frame.
+    if len(payload) < _DATA_HDR or payload[0] != TYPE_DATA:
+        return None
+    ctr, t_ms = struct.unpack_from(">HI", payload, 1)
+    n = payload[7]
+    if len(payload) < _DATA_HDR + n:
+        return None
+    return ctr, t_ms, payload[_DATA_HDR:_DATA_HDR + n]
+
+# ---------- Frame parsing ----------
+def parse_kvs(text):
+    # Same single-pass scanner as parse_kvs_bytes, for callers that
+    # already hold a str. No split() lists and no strip(): our frames
+    # never carry whitespace around keys or values.
+    kv = {}
+    i = 0
+    n = len(text)
+    while i < n:
+        j = text.find("=", i)
+        if j < 0:
+            break
+        k = text.find(",", j)
+        if k < 0:
+            k = n
+        kv[text[i:j]] = text[j + 1:k]
+        i = k + 1
+    return kv
+
+@micropython.native
+def parse_kvs_bytes(buf):
+    # Single pass over the raw payload: no UTF-8 decode of the frame and
+    # no split() temporaries. Keys and values come back as bytes.
+    # native: this runs for every received frame.
+    kv = {}
+    i = 0
+    n = len(buf)
+    while i < n:
+        j = buf.find(b"=", i)
+        if j < 0:
+            break
+        k = buf.find(b",", j)
+        if k < 0:
+            k = n
+        kv[buf[i:j]] = buf[j + 1:k]
+        i = k + 1
+    return kv
+
+# ---------- Per-message keys ----------
+_MSG_KDF_PREFIX = b"MSG-KDF-v1|"
+
+# Midstate cache: prefix|master_key|"|" is fixed per session, so on
+# ports whose sha256 objects support copy() (mbedtls-backed builds) we
+# absorb it once and clone the state per message, leaving only the
+# 4-byte counter to hash. Ports without copy() take the full path.
+_msg_kdf_mid = None
+_msg_kdf_mid_key = None
+
+def derive_msg_key(master_key, counter):
+    global _msg_kdf_mid, _msg_kdf_mid_key
+    if master_key is not _msg_kdf_mid_key:
+        h = uhashlib.sha256(_MSG_KDF_PREFIX)
+        h.update(master_key)
+        h.update(b"|")
+        if hasattr(h, "copy"):
+            _msg_kdf_mid = h
+            _msg_kdf_mid_key = master_key
+        else:
+            h.update(struct.pack(">I", counter & 0xFFFFFFFF))
+            return h.digest()[:16]
+    h = _msg_kdf_mid.copy()
+    h.update(struct.pack(">I", counter & 0xFFFFFFFF))
+    return h.digest()[:16]
+
+# === Synthesized rolling key (LCG + SHA-256) ===
+# RSSI is only used to seed this generator (via q from Bob + nonce).
+# Then each message derives a fresh key using the rolling LCG state.
+LCG_A = const(1103515245)
+LCG_C = const(12345)
+
+# Consecutive counters advance one step at a time; remember the last
+# (seed, steps, state) so the common next-frame case costs a single LCG
+# step and an out-of-order counter costs O(log delta) instead of
+# O(counter) interpreter iterations.
+_lcg_last = [None, 0, 0]
+
+def _lcg_advance(seed32, steps):
+    seed32 &= 0xFFFFFFFF
+    if seed32 == _lcg_last[0] and steps >= _lcg_last[1]:
+        s = _lcg_last[2]
+        n = steps - _lcg_last[1]
+    else:
+        s = seed32
+        n = steps
+    if n:
+        # Closed form by composing the affine map x -> A*x + C under
+        # binary exponentiation. A-1 is even mod 2^32, so the textbook
+        # geometric-series formula has no modular inverse; composing
+        # (a, c) pairs needs no division at all.
+        a, c = 1, 0
+        ba, bc = LCG_A, LCG_C
+        while n:
+            if n & 1:
+                a = (ba * a) & 0xFFFFFFFF
+                c = (ba * c + bc) & 0xFFFFFFFF
+            bc = (ba * bc + bc) & 0xFFFFFFFF
+            ba = (ba * ba) & 0xFFFFFFFF
+            n >>= 1
+        s = (a * s + c) & 0xFFFFFFFF
+    _lcg_last[0] = seed32
+    _lcg_last[1] = steps
+    _lcg_last[2] = s
+    return s
+
+def synth_msg_key(session_key, lcg_seed32, counter):
+    # counter=0 -> 1 step; counter=1 -> 2 steps; etc.
+    state = _lcg_advance(lcg_seed32, counter + 1)
+    h = uhashlib.sha256(b"SYNTHK-v1|" + session_key + struct.pack(">I", state))
+    return h.digest()[:16]
+
+def synth_seed32_from_q_nonce(q, nonce_bytes):
+    # Same fixed-width q encoding as the RSSI KDF (v2).
+    h = uhashlib.sha256(b"LCG-SEEDv2|" + struct.pack(">h", q) + b"|" + nonce_bytes).digest()
+    return struct.unpack(">I", h[:4])[0]
+
+# Retransmitted/duplicated counters re-derive the same per-message key;
+# keep a small bounded cache so repeats skip the LCG walk + SHA entirely.
+_MSG_KEY_CACHE_MAX = const(32)
+_msg_key_cache = {}
+_msg_key_order = []
+
+def msg_key_for(session_key, lcg_seed32, ctr):
+    k = _msg_key_cache.get(ctr)
+    if k is not None:
+        return k
+    if lcg_seed32 is None:
+        k = derive_msg_key(session_key, ctr)  # fallback
+    else:
+        k = synth_msg_key(session_key, lcg_seed32, ctr)
+    _msg_key_cache[ctr] = k
+    _msg_key_order.append(ctr)
+    if len(_msg_key_order) > _MSG_KEY_CACHE_MAX:
+        del _msg_key_cache[_msg_key_order.pop(0)]
+    return k
+
+def reset_msg_key_cache():
+    # Call on a new handshake: keys from an old session are dead.
+    _msg_key_cache.clear()
+    del _msg_key_order[:]
@@ -1,143 +1,124 @@
 # lora_sender.py — RSSI-based dynamic key exchange + FHSS + per-message key (MicroPython, ESP32 + SX1276)
 from lora_min import SX1276
-import time, ucryptolib, ubinascii, uhashlib, struct
-
-# --- secure random bytes for nonces/IVs ---
-try:
-    from os import urandom
-except ImportError:
-    try:
-        from uos import urandom
-    except ImportError:
-        import machine
-        def urandom(n): return bytes(machine.rng() & 0xFF for _ in range(n))
+from lora_proto import (
+    urandom, unhex, tohex, Hex,
+    FREQ_TABLE_MHZ, HOP_GUARD_MS, TAG_BLOCK,
+    current_slot, set_freq_for_slot, slot_and_left_ms,
+    q_rssi, kdf_from_rssi_and_nonce,
+    ctr_crypt, pack_data_frame, parse_kvs_bytes,
+    derive_msg_key, synth_msg_key, synth_seed32_from_q_nonce,
+)
+import time, micropython, ucryptolib
+from micropython import const
 
 # === RADIO CONFIG (non-FHSS params) ===
-TX_POWER = 14
-SPREADING_FACTOR = 7
-
-# === FHSS CONFIG (MUST MATCH RECEIVER) ===
-FREQ_TABLE_MHZ = [920.6, 920.8, 921.0, 921.2, 921.4, 921.6, 923.2, 923.4]
-HOP_INTERVAL_MS = 10000          # hop every 10 seconds
-SECRET_SEED     = 0x1234ABCD     # must match RX
-
-# Guard so we don't miss frames around slot edges
-HOP_GUARD_MS = 250               # tune 100–500ms depending on your timing
+TX_POWER = const(14)
+SPREADING_FACTOR = const(7)
+
+# Per-frame logging gate. const() lets the compiler drop the gated
+# prints entirely when set to 0 (USB-CDC printing costs more than the
+# crypto it reports); handshake prints are rare and stay unconditional.
+VERBOSE = const(1)
+
+# === DATA TX PACING ===
+# One data frame per period, scheduled against an absolute deadline so
+# the cadence doesn't drift by the per-loop work the way sleep(2) did.
+TX_PERIOD_MS = const(2000)
+# Rough SF7 airtime for our short frames; used only to decide whether a
+# TX would straddle a hop boundary.
+TX_AIRTIME_EST_MS = const(150)
 
 # === RSSI / BRUTEFORCE TUNING ===
-RSSI_WINDOW_DB = 8
-RSSI_STEP_DB   = 1
-TAG_BLOCK      = b"HSK-OK-ICEWIN!!#"  # must match RX (16 bytes)
-
-def _prn_from_slot(slot):
-    x = (SECRET_SEED ^ slot) & 0xFFFFFFFF
-    x = (1103515245 * x + 12345) & 0x7FFFFFFF
-    return x
-
-def hop_freq_for_slot(slot):
-    prn = _prn_from_slot(slot)
-    idx = prn % len(FREQ_TABLE_MHZ)
-    return FREQ_TABLE_MHZ[idx]
-
-def current_slot():
-    return time.ticks_ms() // HOP_INTERVAL_MS
-
-def set_freq_for_slot(lora, slot):
-    f = hop_freq_for_slot(slot)
-    lora.set_frequency(int(f * 1_000_000))
-    return f
-
-def time_left_in_slot_ms():
-    now = time.ticks_ms()
-    elapsed = now % HOP_INTERVAL_MS
-    return HOP_INTERVAL_MS - elapsed
-
-def q_rssi(rssi_dbm, step=1):
-    return int(round(rssi_dbm / step) * step)
-
-def kdf_from_rssi_and_nonce(q, nonce_bytes):
-    h = uhashlib.sha256(b"RSSI-KDFv1|" + str(q).encode() + b"|" + nonce_bytes)
-    return h.digest()[:16]
-
-def aes_ecb_decrypt(key16, ct):
-    c = ucryptolib.aes(key16, 1)  # ECB
-    return c.decrypt(ct)
-
-def pkcs7_pad(b):
-    pad = 16 - (len(b) % 16)
-    return b + bytes([pad]) * pad
-
-def pkcs7_unpad(b):
-    pad = b[-1]
-    if pad < 1 or pad > 16 or b[-pad:] != bytes([pad]) * pad:
-        raise ValueError("bad PKCS#7 padding")
-    return b[:-pad]
-
-def enc_msg_cbc(key16, msg_str):
-    iv = urandom(16)
-    c = ucryptolib.aes(key16, 2, iv)  # CBC
-    ct = c.encrypt(pkcs7_pad(msg_str.encode()))
-    return ubinascii.hexlify(iv).decode(), ubinascii.hexlify(ct).decode()
-
-def parse_kvs(text):
-    kv = {}
-    for part in text.split(","):
-        if "=" in part:
-            k, v = part.split("=", 1)
-            kv[k.strip()] = v.strip()
-    return kv
-
-def derive_msg_key(master_key, counter):
-    b_ctr = struct.pack(">I", counter & 0xFFFFFFFF)
-    h = uhashlib.sha256(b"MSG-KDF-v1|" + master_key + b"|" + b_ctr)
-    return h.digest()[:16]
-
-
-
-# === Synthesized rolling key (LCG + SHA-256) ===
-# RSSI is only used to seed this generator (via q from Bob + nonce).
-# Then each message derives a fresh key using the rolling LCG state.
-LCG_A = 1103515245
-LCG_C = 12345
-
-def _lcg_advance(seed32, steps):
-    s = seed32 & 0xFFFFFFFF
-    for _ in range(steps):
-        s = (LCG_A * s + LCG_C) & 0xFFFFFFFF
-    return s
-
-def synth_msg_key(session_key, lcg_seed32, counter):
-    # counter=0 -> 1 step; counter=1 -> 2 steps; etc.
-    state = _lcg_advance(lcg_seed32, counter + 1)
-    h = uhashlib.sha256(b"SYNTHK-v1|" + session_key + struct.pack(">I", state))
-    return h.digest()[:16]
-
-def synth_seed32_from_q_nonce(q, nonce_bytes):
-    h = uhashlib.sha256(b"LCG-SEEDv1|" + str(q).encode() + b"|" + nonce_bytes).digest()
-    return struct.unpack(">I", h[:4])[0]
+RSSI_WINDOW_DB = const(8)
+RSSI_STEP_DB   = const(1)
+
+# Scan order for the unwrap: the measured reply RSSI is by far the most
+# likely q, so walk outward from the center (0, -1, +1, -2, +2, ...)
+# instead of sweeping -window..+window. Built once at import.
+_DQ_ORDER = (0,) + tuple(
+    s * d
+    for d in range(RSSI_STEP_DB, RSSI_WINDOW_DB + 1, RSSI_STEP_DB)
+    for s in (-1, 1)
+)
+
+@micropython.viper
+def _tag_diff(pt: ptr32, tag: ptr32) -> int:
+    # XOR-accumulate the tag block (words 4..7 of the 32-byte plaintext)
+    # against TAG_BLOCK: no slice objects, four word compares, one branch.
+    d = pt[4] ^ tag[0]
+    d |= pt[5] ^ tag[1]
+    d |= pt[6] ^ tag[2]
+    d |= pt[7] ^ tag[3]
+    return d
+
+# Decrypt output scratch: ucryptolib can decrypt into a caller buffer,
+# so the 17-candidate scan reuses one 32-byte bytearray instead of
+# taking a fresh bytes per candidate.
+_PT_BUF = bytearray(32)
+
+# Last successful offset from the reply RSSI. Link RSSI drifts slowly,
+# so the dq that worked for the previous handshake is the best first
+# guess for the next one; a fresh boot starts at the center (0).
+_last_dq = 0
+
+@micropython.native
+def _bf_core(ek, nonce, rssi_center, dq_first):
+    # Tight kernel for the RSSI-window scan. The AES context is built
+    # inline and the tag check runs word-wise before the session-key
+    # slice, so failing candidates allocate nothing beyond the 32-byte
+    # plaintext. Hot names are bound to locals once: LOAD_FAST instead
+    # of a global-dict lookup per candidate.
+    _aes = ucryptolib.aes
+    _kdf = kdf_from_rssi_and_nonce
+    _qr = q_rssi
+    _diff = _tag_diff
+    _tag = TAG_BLOCK
+    buf = _PT_BUF
+    # No try/except in the loop: ek/nonce are length-checked and parsed
+    # by the caller, so nothing here can raise and MicroPython skips 17
+    # exception-frame setups per handshake.
+    q = _qr(rssi_center + dq_first)
+    K = _kdf(q, nonce)
+    _aes(K, 1).decrypt(ek, buf)
+    if _diff(buf, _tag) == 0:
+        return bytes(buf[:16]), q
+    for dq in _DQ_ORDER:
+        if dq == dq_first:
+            continue
+        q = _qr(rssi_center + dq)
+        K = _kdf(q, nonce)
+        _aes(K, 1).decrypt(ek, buf)  # 32 bytes: preflighted upstream
+        if _diff(buf, _tag) == 0:
+            return bytes(buf[:16]), q
+    return None, None
+
 def unwrap_session_key_bruteforce(ek_hex, nonce_hex, rssi_reply_dbm):
-    ek = ubinascii.unhexlify(ek_hex)
-    nonce = ubinascii.unhexlify(nonce_hex)
+    # Validate the frame once, outside the loop: ek must be exactly two
+    # AES blocks (SESSION_KEY || TAG_BLOCK) and the nonce 8 bytes. A
+    # malformed reply bails here instead of failing 17 decrypts deep.
+    if len(ek_hex) != 64 or len(nonce_hex) != 16:
+        print("Alice: malformed key reply (ek_len={} nonce_len={})".format(
+            len(ek_hex), len(nonce_hex)
+        ))
+        return None, None
+    try:
+        ek = unhex(ek_hex)
+        nonce = unhex(nonce_hex)
+    except ValueError:
+        print("Alice: non-hex ek/nonce in key reply")
+        return None, None
 
     print("[STEP 4] Alice: start brute-force unwrap of SESSION_KEY")
     print("          RSSI_reply_dbm={} | window=±{} dB | step={}".format(
         rssi_reply_dbm, RSSI_WINDOW_DB, RSSI_STEP_DB
     ))
 
-    for dq in range(-RSSI_WINDOW_DB, RSSI_WINDOW_DB + 1, RSSI_STEP_DB):
-        q = q_rssi(rssi_reply_dbm + dq)
-        K = kdf_from_rssi_and_nonce(q, nonce)
-        try:
-            pt = aes_ecb_decrypt(K, ek)  # expected 32 bytes
-            if len(pt) != 32:
-                continue
-            sess = pt[:16]
-            tag  = pt[16:32]
-            if tag == TAG_BLOCK:
-                print("[STEP 5] Alice: found matching TAG_BLOCK at q={}".format(q))
-                return sess, q
-        except Exception:
-            pass
+    global _last_dq
+    sess, q = _bf_core(ek, nonce, rssi_reply_dbm, _last_dq)
+    if sess is not None:
+        _last_dq = q - rssi_reply_dbm
+        print("[STEP 5] Alice: found matching TAG_BLOCK at q={} (dq={})".format(q, _last_dq))
+        return sess, q
 
     print("[STEP 5] Alice: FAILED to find correct key in window")
     return None, None
@@ -158,35 +139,47 @@ def main():
     session_key = None
     lcg_seed32  = None
     counter = 0
-    message = "HELLLLLLLOOOOOOOO"
+    msg_bytes = b"HELLLLLLLOOOOOOOO"
+
+    # Hot-loop locals: LOAD_FAST is much cheaper than LOAD_GLOBAL+LOAD_ATTR
+    ticks_ms = time.ticks_ms
+    sleep_ms = time.sleep_ms
+    ticks_add = time.ticks_add
+    ticks_diff = time.ticks_diff
+    send = lora.send
+    recv = lora.recv
+    _hop = set_freq_for_slot
+
+    tx_deadline = ticks_ms()
 
     while True:
         # --- Handshake ---
         if session_key is None:
             nonce = urandom(8)
-            nonce_hex = ubinascii.hexlify(nonce).decode()
+            nonce_hex = tohex(nonce)
+            nonce_hex_b = nonce_hex.encode()
             hello = "hello=1,nonce={}".format(nonce_hex)
 
             # Pin to ONE slot for HELLO + waiting reply
-            slot = current_slot()
-            freq = set_freq_for_slot(lora, slot)
+            slot, left_ms = slot_and_left_ms()
+            freq = _hop(lora, slot)
 
-            ok = lora.send(hello.encode(), timeout_ms=1500)
+            ok = send(hello.encode(), timeout_ms=1500)
             if ok:
                 print("[STEP 1] Alice: sent HELLO on %.3f MHz slot=%d" % (freq, slot))
                 print("          nonce={}".format(nonce_hex))
             else:
                 print("Alice: TX HELLO timeout on %.3f MHz slot=%d" % (freq, slot))
-                time.sleep_ms(200)
+                sleep_ms(200)
                 continue
 
             # Wait only until slot ends (plus guard), still on same freq/slot
-            timeout_ms = time_left_in_slot_ms() + HOP_GUARD_MS
-            rx, rssi, snr = lora.recv(timeout_ms=timeout_ms)
+            timeout_ms = left_ms + HOP_GUARD_MS
+            rx, rssi, snr = recv(timeout_ms=timeout_ms)
 
             if rx is None:
                 print("Alice: No key reply; retrying handshake (freq=%.3f slot=%d)" % (freq, slot))
-                time.sleep_ms(200)
+                sleep_ms(200)
                 continue
 
             print("[STEP 4] Alice: got key reply frame")
@@ -195,42 +188,43 @@ def main():
             ))
 
             try:
-                text = rx.decode()
-                kv = parse_kvs(text)
-                print("Alice: raw key reply =", text)
+                # Stay in bytes: no UTF-8 decode of the whole frame just
+                # to re-split it; only tiny fields get decoded below.
+                kv = parse_kvs_bytes(rx)
+                print("Alice: raw key reply =", rx)
 
-                if "ek" not in kv or "nonce" not in kv:
+                if b"ek" not in kv or b"nonce" not in kv:
                     print("Alice: Unexpected reply, missing ek/nonce")
-                    time.sleep_ms(200)
+                    sleep_ms(200)
                     continue
 
-                if kv["nonce"] != nonce_hex:
+                if kv[b"nonce"] != nonce_hex_b:
                     print("Alice: Nonce mismatch (possible replay/other convo)")
-                    print("        expected={} got={}".format(nonce_hex, kv["nonce"]))
+                    print("        expected={} got={}".format(nonce_hex, kv[b"nonce"]))
                     continue
 
                 session_key, q_found = unwrap_session_key_bruteforce(
-                    kv["ek"], kv["nonce"], rssi_reply_dbm=int(rssi)
+                    kv[b"ek"], kv[b"nonce"], rssi_reply_dbm=int(rssi)
                 )
                 if session_key:
                     print("[STEP 5] Alice: handshake OK")
                     print("          q_found={} | RSSI_reply={} dBm".format(q_found, rssi))
-                    print("          SESSION_KEY = {}".format(ubinascii.hexlify(session_key)))
+                    print("          SESSION_KEY =", Hex(session_key))
                     # Seed synthesized rolling key using Bob's quantized RSSI (q) + nonce
                     try:
-                        q_seed = int(kv.get("q", q_found))
+                        q_seed = int(kv[b"q"].decode())
                     except Exception:
                         q_seed = q_found
                     lcg_seed32 = synth_seed32_from_q_nonce(q_seed, nonce)
                     print("          synthesized rolling seed32 = 0x%08X (q_seed=%s)" % (lcg_seed32, q_seed))
                 else:
                     print("Alice: Handshake FAILED (window={} dB)".format(RSSI_WINDOW_DB))
-                    time.sleep_ms(200)
+                    sleep_ms(200)
                     continue
 
             except Exception as e:
                 print("Alice: Key reply parse/decrypt error:", e)
-                time.sleep_ms(200)
+                sleep_ms(200)
                 continue
 
         # --- Secure data ---
@@ -238,28 +232,43 @@ def main():
             msg_key = derive_msg_key(session_key, counter)  # fallback
         else:
             msg_key = synth_msg_key(session_key, lcg_seed32, counter)
-        print("[STEP 7] Alice: per-message key derived (ctr={}): K_msg={}".format(
-            counter, ubinascii.hexlify(msg_key).decode()
-        ))
-
-        iv_hex, ct_hex = enc_msg_cbc(msg_key, message)
-        t_ms = time.ticks_ms()
-        payload = "iv={},msg={},counter={},t={},kind=data".format(
-            iv_hex, ct_hex, counter, t_ms
-        )
-
-        slot = current_slot()
-        freq = set_freq_for_slot(lora, slot)
-        ok = lora.send(payload.encode(), timeout_ms=1500)
+        if VERBOSE:
+            print("[STEP 7] Alice: per-message key derived (ctr={}): K_msg=".format(counter), Hex(msg_key))
+
+        ct = ctr_crypt(msg_key, counter, msg_bytes)
+        t_ms = ticks_ms()
+        payload = pack_data_frame(counter, t_ms, ct)
+
+        slot, left_ms = slot_and_left_ms()
+        if left_ms < TX_AIRTIME_EST_MS + HOP_GUARD_MS:
+            # Too close to the hop edge: let the slot roll over instead
+            # of losing the frame mid-hop, then TX on the fresh slot.
+            sleep_ms(left_ms)
+            slot, left_ms = slot_and_left_ms()
+        freq = _hop(lora, slot)
+        ok = send(payload, timeout_ms=1500)
         if ok:
-            print("[STEP 6] Alice: TX secure data ok (ctr={} t={} freq={:.3f} slot={})".format(
-                counter, t_ms, freq, slot
-            ))
+            if VERBOSE:
+                print("[STEP 6] Alice: TX secure data ok (ctr={} t={} freq={:.3f} slot={})".format(
+                    counter, t_ms, freq, slot
+                ))
         else:
             print("Alice: TX data timeout on freq={:.3f} slot={}".format(freq, slot))
 
-        counter += 1
-        time.sleep(2)
+        # The wire counter is 16 bits; wrap so key derivation and the
+        # framed value stay in step.
+        counter = (counter + 1) & 0xFFFF
+
+        # Absolute-deadline pacing: sleep to the next multiple of the
+        # period rather than a fixed 2 s after however long this
+        # iteration took. If we fell behind (handshake, edge backoff),
+        # resync instead of bursting to catch up.
+        tx_deadline = ticks_add(tx_deadline, TX_PERIOD_MS)
+        delay = ticks_diff(tx_deadline, ticks_ms())
+        if delay > 0:
+            sleep_ms(delay)
+        else:
+            tx_deadline = ticks_ms()
 
 if __name__ == "__main__":
     try: